@@ -0,0 +1,372 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+
+This module implements an asynchronous variant of :mod:`prestodb.client` on
+top of ``httpx``. Many queries can run concurrently from a single event loop
+and share the connection pool of one ``httpx.AsyncClient``.
+
+The response processing and the session headers are shared with the
+synchronous client, only the HTTP layer differs: ::
+
+    >> request = AsyncPrestoRequest(host='coordinator', port=8080,
+    ..                              client_session=ClientSession(user='test'))
+    >> query = AsyncPrestoQuery(request, sql)
+    >> rows = [row async for row in await query.execute()]
+
+Authentication is not supported yet.
+"""
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Text, Tuple, Union  # NOQA for mypy types
+
+import httpx
+
+from prestodb import constants, exceptions
+from prestodb.client import (
+    MAX_ATTEMPTS,
+    PROXIES,
+    ClientSession,
+    PrestoResult,
+    PrestoStatus,
+    decode_json,
+    process_response,
+    raise_response_error,
+)
+
+
+__all__ = ["AsyncPrestoQuery", "AsyncPrestoRequest"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPrestoRequest(object):
+    """
+    Manage the HTTP requests of a Presto query with an ``httpx.AsyncClient``.
+
+    The parameters shared with :class:`prestodb.client.PrestoRequest` have
+    the same meaning. In addition:
+
+    :param http_client: ``httpx.AsyncClient`` to send the requests with.
+                        ``None`` creates one that is closed by :meth:`close`.
+    :param max_connections: size of the connection pool of the created client.
+    :param max_keepalive_connections: idle connections kept in the pool.
+    :param http2: negotiate HTTP/2 with the coordinator when it supports it.
+                  Requires the ``h2`` package.
+    :param retry_delay: callable returning the delay in seconds before the
+                        given attempt.
+    """
+
+    HTTP_EXCEPTIONS = (httpx.TransportError,)
+
+    def __init__(
+        self,
+        host,  # type: Text
+        port,  # type: int
+        client_session,  # type: ClientSession
+        http_client=None,  # type: Optional[httpx.AsyncClient]
+        http_scheme=constants.HTTP,  # type: Text
+        redirect_handler=None,
+        max_attempts=MAX_ATTEMPTS,  # type: int
+        request_timeout=constants.DEFAULT_REQUEST_TIMEOUT,  # type: Union[float, Tuple[float, float]]
+        retry_delay=exceptions.DelayExponential(),
+        max_connections=100,  # type: int
+        max_keepalive_connections=20,  # type: int
+        http2=True,  # type: bool
+    ):
+        # type: (...) -> None
+        self._client_session = client_session
+        self._host = host
+        self._port = port
+        self._next_uri = None  # type: Optional[Text]
+        self._session_headers = None  # type: Optional[Dict[Text, Text]]
+        self._http_headers = {}  # type: Dict[Text, Text]
+        self._http_scheme = http_scheme
+        self._redirect_handler = redirect_handler
+        self._retry_delay = retry_delay
+        self.max_attempts = max_attempts
+
+        if isinstance(request_timeout, tuple):
+            connect_timeout, read_timeout = request_timeout
+            self._request_timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        else:
+            self._request_timeout = httpx.Timeout(request_timeout)
+
+        self._owns_http_client = http_client is None
+        if http_client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                ),
+                http2=http2,
+                proxy=PROXIES["http"] if PROXIES else None,
+            )
+        self._http_client = http_client
+
+    @property
+    def transaction_id(self):
+        return self._client_session.transaction_id
+
+    @transaction_id.setter
+    def transaction_id(self, value):
+        self._client_session.transaction_id = value
+
+    @property
+    def http_headers(self):
+        # type: () -> Dict[Text, Text]
+        # httpx rejects ``None`` values that requests silently drops
+        session_headers = self._client_session.http_headers
+        if session_headers is not self._session_headers:
+            self._session_headers = session_headers
+            self._http_headers = {
+                key: value for key, value in session_headers.items() if value is not None
+            }
+        return self._http_headers
+
+    @property
+    def http_client(self):
+        return self._http_client
+
+    def get_url(self, path):
+        # type: (Text) -> Text
+        return "{protocol}://{host}:{port}{path}".format(
+            protocol=self._http_scheme, host=self._host, port=self._port, path=path
+        )
+
+    @property
+    def statement_url(self):
+        # type: () -> Text
+        return self.get_url(constants.URL_STATEMENT_PATH)
+
+    @property
+    def next_uri(self):
+        # type: () -> Text
+        return self._next_uri
+
+    async def _send(self, method, url, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                http_response = await self._http_client.request(
+                    method, url, timeout=self._request_timeout, **kwargs
+                )
+            except self.HTTP_EXCEPTIONS:
+                if attempt == self.max_attempts:
+                    logger.info("failed after {} attempts".format(attempt))
+                    raise
+            else:
+                # need retry when there is no exception but the status code is 503
+                if http_response.status_code != 503 or attempt == self.max_attempts:
+                    return http_response
+            await asyncio.sleep(self._retry_delay(attempt))
+
+    async def post(self, sql):
+        data = sql.encode("utf-8")
+        http_headers = self.http_headers
+
+        http_response = await self._send(
+            "POST",
+            self.statement_url,
+            content=data,
+            headers=http_headers,
+            follow_redirects=self._redirect_handler is None,
+        )
+        if self._redirect_handler is not None:
+            while http_response is not None and http_response.is_redirect:
+                location = http_response.headers["Location"]
+                url = self._redirect_handler.handle(location)
+                logger.info(
+                    "redirect {} from {} to {}".format(
+                        http_response.status_code, location, url
+                    )
+                )
+                http_response = await self._send(
+                    "POST",
+                    url,
+                    content=data,
+                    headers=http_headers,
+                    follow_redirects=False,
+                )
+        return http_response
+
+    async def get(self, url):
+        return await self._send("GET", url, headers=self.http_headers)
+
+    async def delete(self, url):
+        return await self._send("DELETE", url)
+
+    def raise_response_error(self, http_response):
+        raise_response_error(http_response)
+
+    def process(self, http_response):
+        # type: (httpx.Response) -> PrestoStatus
+        if http_response.is_error:
+            self.raise_response_error(http_response)
+
+        response = decode_json(http_response.content)
+        status = process_response(self._client_session, http_response.headers, response)
+        self._next_uri = status.next_uri
+        return status
+
+    async def close(self):
+        # type: () -> None
+        """Close the ``httpx.AsyncClient`` if it was created by this request."""
+        if self._owns_http_client:
+            await self._http_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+class AsyncPrestoResult(PrestoResult):
+    """
+    Represent the result of a Presto query as an asynchronous iterator on
+    rows. Further pages are fetched while iterating.
+    """
+
+    def __iter__(self):
+        raise TypeError("use 'async for' to iterate over an AsyncPrestoResult")
+
+    async def fetch_all(self):
+        # type: () -> List[List[Any]]
+        """Fetch the remaining rows of the query and return them in a list."""
+        return [row async for row in self]
+
+    def __aiter__(self):
+        # a single iterator, as the pages are only fetched once
+        if self._iterator is None:
+            self._iterator = self._aiter_rows()
+        return self._iterator
+
+    async def _aiter_rows(self):
+        # Initial fetch from the first POST request
+        for row in self._map_rows(self._rows):
+            self._rownumber += 1
+            yield row
+        self._rows = None
+
+        # Subsequent fetches from GET requests until next_uri is empty.
+        while not self._query.is_finished():
+            rows = await self._query.fetch()
+            for row in self._map_rows(rows):
+                self._rownumber += 1
+                yield row
+
+
+class AsyncPrestoQuery(object):
+    """Represent the execution of a SQL statement by Presto with asyncio."""
+
+    def __init__(
+        self,
+        request,  # type: AsyncPrestoRequest
+        sql,  # type: Text
+        experimental_python_types = False,
+    ):
+        # type: (...) -> None
+        self.query_id = None  # type: Optional[Text]
+
+        self._stats = {}  # type: Dict[Any, Any]
+        self._warnings = []  # type: List[Dict[Any, Any]]
+        self._columns = None  # type: Optional[List[Text]]
+        self._finished = False
+        self._cancelled = False
+        self._request = request
+        self._sql = sql
+        # not read from the request, which concurrent queries share
+        self._next_uri = None  # type: Optional[Text]
+        self._result = AsyncPrestoResult(self, experimental_python_types=experimental_python_types)
+        self._experimental_python_types = experimental_python_types
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def warnings(self):
+        return self._warnings
+
+    @property
+    def result(self):
+        return self._result
+
+    async def execute(self):
+        # type: () -> AsyncPrestoResult
+        """Initiate a Presto query by sending the SQL statement
+
+        See :meth:`prestodb.client.PrestoQuery.execute`.
+        """
+        if self._cancelled:
+            raise exceptions.PrestoUserError("Query has been cancelled", self.query_id)
+
+        response = await self._request.post(self._sql)
+        status = self._request.process(response)
+        self.query_id = status.id
+        self._stats.update({"queryId": self.query_id})
+        self._stats.update(status.stats)
+        if status.columns:
+            self._columns = status.columns
+        self._warnings = status.warnings
+        self._next_uri = status.next_uri
+        if status.next_uri is None:
+            self._finished = True
+        self._result = AsyncPrestoResult(self, status.rows, self._experimental_python_types)
+        while (
+            not self._finished and not self._cancelled and not self._result._rows
+        ):
+            self._result._rows += await self.fetch()
+        return self._result
+
+    async def fetch(self):
+        # type: () -> List[List[Any]]
+        """Continue fetching data for the current query_id"""
+        if self._next_uri is None:
+            self._finished = True
+            return []
+        response = await self._request.get(self._next_uri)
+        status = self._request.process(response)
+        self._next_uri = status.next_uri
+        if status.columns:
+            self._columns = status.columns
+        self._stats.update(status.stats)
+        if status.next_uri is None:
+            self._finished = True
+        return status.rows
+
+    async def cancel(self):
+        # type: () -> None
+        """Cancel the current query"""
+        if self.query_id is None or self.is_finished():
+            return
+
+        self._cancelled = True
+        url = self._request.get_url("/v1/query/{}".format(self.query_id))
+        logger.debug("cancelling query: %s", self.query_id)
+        response = await self._request.delete(url)
+        logger.info(response)
+        if response.status_code == httpx.codes.NO_CONTENT:
+            logger.debug("query cancelled: %s", self.query_id)
+            return
+        self._request.raise_response_error(response)
+
+    def is_finished(self):
+        # type: () -> bool
+        return self._finished
@@ -0,0 +1,138 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+
+This module converts pages of rows returned by Presto into ``pyarrow``
+record batches, one Arrow array per column. It is used by
+:meth:`prestodb.client.PrestoQuery.fetch_arrow`.
+
+Every Presto type is mapped to a fixed Arrow type, so that all the batches of
+a query share one schema whatever the values of each page. Values of types
+that Arrow cannot parse from their JSON representation, like ``time`` or
+``timestamp with time zone``, are kept as strings. Values of types without an
+Arrow equivalent, like ``map`` or ``row``, are kept as JSON strings.
+"""
+from __future__ import absolute_import, division, print_function
+
+import json
+from typing import Any, Dict, List, Optional  # NOQA for mypy types
+
+import pyarrow as pa
+
+
+_PRIMITIVE_TYPES = {
+    "boolean": pa.bool_(),
+    "tinyint": pa.int8(),
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float32(),
+    "double": pa.float64(),
+    "varchar": pa.string(),
+    "char": pa.string(),
+    "varbinary": pa.string(),
+    "json": pa.string(),
+    "uuid": pa.string(),
+    "ipaddress": pa.string(),
+    "time": pa.string(),
+    "time with time zone": pa.string(),
+    "timestamp with time zone": pa.string(),
+}
+
+
+def to_arrow_type(type_signature):
+    # type: (Dict[str, Any]) -> pa.DataType
+    """Return the Arrow type of a Presto type."""
+    raw_type = type_signature["rawType"]
+    arguments = type_signature.get("arguments") or []
+    if raw_type in _PRIMITIVE_TYPES:
+        return _PRIMITIVE_TYPES[raw_type]
+    if raw_type == "decimal" and len(arguments) == 2:
+        precision, scale = (argument["value"] for argument in arguments)
+        return pa.decimal128(precision, scale)
+    if raw_type == "date":
+        return pa.date32()
+    if raw_type == "timestamp":
+        return pa.timestamp("us")
+    if raw_type == "array" and arguments:
+        return pa.list_(to_arrow_type(arguments[0]["value"]))
+    return pa.string()
+
+
+def to_arrow_schema(columns):
+    # type: (List[Dict[str, Any]]) -> pa.Schema
+    """Return the schema of the record batches of a query."""
+    return pa.schema(
+        [pa.field(column["name"], to_arrow_type(column["typeSignature"])) for column in columns]
+    )
+
+
+def _wire_type(arrow_type):
+    # type: (pa.DataType) -> pa.DataType
+    """Return the type of the values as sent by Presto, to cast from."""
+    if (
+        pa.types.is_decimal(arrow_type)
+        or pa.types.is_date(arrow_type)
+        or pa.types.is_timestamp(arrow_type)
+    ):
+        return pa.string()
+    if pa.types.is_list(arrow_type):
+        return pa.list_(_wire_type(arrow_type.value_type))
+    return arrow_type
+
+
+def _prepare(values, arrow_type):
+    # type: (List[Any], pa.DataType) -> List[Any]
+    """Convert the values that Arrow cannot build an array of *arrow_type* from."""
+    if pa.types.is_list(arrow_type):
+        return [
+            None if value is None else _prepare(value, arrow_type.value_type)
+            for value in values
+        ]
+    if pa.types.is_floating(arrow_type):
+        # NaN and infinities are sent as strings
+        return [float(value) if isinstance(value, str) else value for value in values]
+    if pa.types.is_string(arrow_type):
+        # maps, rows and other structured values
+        return [
+            value if value is None or isinstance(value, str) else json.dumps(value)
+            for value in values
+        ]
+    return values
+
+
+def to_arrow_array(values, arrow_type):
+    # type: (List[Any], pa.DataType) -> pa.Array
+    wire_type = _wire_type(arrow_type)
+    try:
+        array = pa.array(values, wire_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        array = pa.array(_prepare(values, arrow_type), wire_type)
+    if wire_type != arrow_type:
+        # decimals, dates and timestamps are sent as strings, parsed by Arrow
+        array = array.cast(arrow_type)
+    return array
+
+
+def to_record_batch(rows, columns, schema=None):
+    # type: (List[List[Any]], List[Dict[str, Any]], Optional[pa.Schema]) -> pa.RecordBatch
+    """Build a record batch from a page of rows and the query columns."""
+    if schema is None:
+        schema = to_arrow_schema(columns)
+    if rows:
+        values = [list(column_values) for column_values in zip(*rows)]
+    else:
+        values = [[] for _ in columns]
+    return pa.RecordBatch.from_arrays(
+        [to_arrow_array(v, field.type) for v, field in zip(values, schema)],
+        schema=schema,
+    )
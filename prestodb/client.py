@@ -34,17 +34,43 @@ The main interface is :class:`PrestoQuery`: ::
 """
 from __future__ import absolute_import, division, print_function
 
+import concurrent.futures
+import functools
+import io
+import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Text, Tuple, Union  # NOQA for mypy types
+import queue
+import re
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Text, Tuple, Union  # NOQA for mypy types
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from operator import itemgetter
 from typing import Any, Dict, List, Optional, Tuple, Union
 import pytz
 
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import prestodb.redirect
 import requests
 import six.moves.urllib_parse as parse
+import urllib3
 from prestodb import constants, exceptions
 from prestodb.transaction import NO_TRANSACTION
 
@@ -62,8 +88,24 @@ if SOCKS_PROXY:
 else:
     PROXIES = None
 
+TIME_TZ_RE = re.compile(r'^(.*)([\+\-])(\d{2}):(\d{2})$')
+
+# raised by the type conversions, e.g. decimal.InvalidOperation by Decimal
+CONVERSION_ERRORS = (ValueError, ArithmeticError)
+
+# characters left unchanged by ``parse.quote`` with its default ``safe="/"``
+SAFE_HEADER_VALUE_RE = re.compile(r'[A-Za-z0-9_.~/\-]*\Z')
+
 
 class ClientSession(object):
+    """
+    Hold the state of a Presto session shared by the requests of a connection.
+
+    The HTTP headers derived from the session are built once and cached. The
+    cache is invalidated when an attribute is assigned, or when the items of
+    ``properties`` or ``headers`` change in place.
+    """
+
     def __init__(
         self,
         user,
@@ -74,27 +116,148 @@ class ClientSession(object):
         headers=None,
         transaction_id=None,
     ):
-        self.catalog = catalog
-        self.schema = schema
-        self.source = source
-        self.user = user
+        self._catalog = catalog
+        self._schema = schema
+        self._source = source
+        self._user = user
         if properties is None:
             properties = {}
         self._properties = properties
         self._headers = headers or {}
+        self._prepared_statements = []  # type: List[Text]
+        self._cached_headers = None  # type: Optional[Dict[Text, Text]]
+        self._cached_items = None  # type: Optional[Tuple[Any, Any]]
+        self._headers_dirty = True
         self.transaction_id = transaction_id
 
     def __repr__(self):
         return f"ClientSession({self.catalog}, {self.schema}, {self.source}, {self.user}, {self._properties}, {self._headers}, {self.transaction_id})"
 
+    @property
+    def catalog(self):
+        return self._catalog
+
+    @catalog.setter
+    def catalog(self, value):
+        self._catalog = value
+        self._headers_dirty = True
+
+    @property
+    def schema(self):
+        return self._schema
+
+    @schema.setter
+    def schema(self, value):
+        self._schema = value
+        self._headers_dirty = True
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        self._source = value
+        self._headers_dirty = True
+
+    @property
+    def user(self):
+        return self._user
+
+    @user.setter
+    def user(self, value):
+        self._user = value
+        self._headers_dirty = True
+
     @property
     def properties(self):
         return self._properties
 
+    @properties.setter
+    def properties(self, value):
+        self._properties = value
+        self._headers_dirty = True
+
     @property
     def headers(self):
         return self._headers
 
+    @property
+    def prepared_statements(self):
+        return self._prepared_statements
+
+    @prepared_statements.setter
+    def prepared_statements(self, value):
+        self._prepared_statements = value
+        self._headers_dirty = True
+
+    @property
+    def transaction_id(self):
+        return self._transaction_id
+
+    @transaction_id.setter
+    def transaction_id(self, value):
+        self._transaction_id = value
+        self._headers_dirty = True
+
+    def invalidate_http_headers(self):
+        # type: () -> None
+        self._headers_dirty = True
+
+    @property
+    def http_headers(self):
+        # type: () -> Dict[Text, Text]
+        """Return the cached HTTP headers. The dict is shared, do not mutate it."""
+        # cheaper than quoting the properties, and catches in-place changes,
+        # e.g. to the ``session_properties`` dict given to a dbapi connection
+        items = (tuple(self._properties.items()), tuple(self._headers.items()))
+        if self._headers_dirty or items != self._cached_items:
+            self._cached_headers = self._build_http_headers()
+            self._cached_items = items
+            self._headers_dirty = False
+        return self._cached_headers
+
+    def _build_http_headers(self):
+        # type: () -> Dict[Text, Text]
+        headers = {}
+
+        headers[constants.HEADER_CATALOG] = self.catalog
+        headers[constants.HEADER_SCHEMA] = self.schema
+        headers[constants.HEADER_SOURCE] = self.source
+        headers[constants.HEADER_USER] = self.user
+        if len(self._prepared_statements) > 0:
+            headers[constants.HEADER_PREPARED_STATEMENT] = ",".join(self._prepared_statements)
+
+        # ``None`` omits the header, including the copy set on the HTTP session
+        if self._properties:
+            headers[constants.HEADER_SESSION] = ",".join(
+                [
+                    # ``name`` must not contain ``=``
+                    "{}={}".format(name, quote_header_value(str(value)))
+                    for name, value in self._properties.items()
+                ]
+            )
+        else:
+            headers[constants.HEADER_SESSION] = None
+
+        # merge custom http headers
+        for key in self._headers:
+            if key in headers.keys():
+                raise ValueError("cannot override reserved HTTP header {}".format(key))
+        headers.update(self._headers)
+
+        headers[constants.HEADER_TRANSACTION] = self._transaction_id
+
+        return headers
+
+
+def quote_header_value(value):
+    # type: (Text) -> Text
+    """Percent-encode a header value, skipping ``parse.quote`` when not needed."""
+    if SAFE_HEADER_VALUE_RE.match(value):
+        return value
+    return parse.quote(value)
+
 
 def get_header_values(headers, header):
     return [val.strip() for val in headers[header].split(",")]
@@ -108,6 +271,168 @@ def get_session_property_values(headers, header):
     ]
 
 
+def decode_json(content):
+    # type: (bytes) -> Any
+    """
+    Decode a response body. Presto always sends UTF-8 JSON, the bytes are
+    parsed directly without decoding them to a ``str`` first.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def read_content(send):
+    # type: (Callable[..., requests.Response]) -> Callable[..., requests.Response]
+    """
+    Wrap a method of ``requests.Session`` called with ``stream=True`` to read
+    the body of the response in a single piece before returning it.
+
+    ``Response.content`` joins the body from 10 KiB chunks, so a page sent
+    with a ``Content-Length`` is held twice in memory while it is read. The
+    body is read within the retries, as it is without ``stream=True``, and
+    kept in ``Response.raw`` as an ``io.BytesIO``: see :func:`read_body`.
+    """
+    @functools.wraps(send)
+    def send_and_read(*args, **kwargs):
+        http_response = send(*args, **kwargs)
+        if http_response is not None and isinstance(
+            http_response.raw, urllib3.response.HTTPResponse
+        ):
+            raw = http_response.raw
+            try:
+                content = raw.read(decode_content=True)
+            # same translation of the urllib3 errors as Response.content
+            except urllib3.exceptions.ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except urllib3.exceptions.DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e)
+            except urllib3.exceptions.ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e)
+            except urllib3.exceptions.SSLError as e:
+                raise requests.exceptions.SSLError(e)
+            finally:
+                raw.release_conn()
+            http_response.raw = io.BytesIO(content)
+        return http_response
+    return send_and_read
+
+
+def read_body(http_response):
+    # type: (requests.Response) -> bytes
+    """Return the body of a response, without copying one read by :func:`read_content`."""
+    if isinstance(http_response.raw, io.BytesIO):
+        return http_response.raw.getvalue()
+    return http_response.content
+
+
+def process_error(error, query_id):
+    error_type = error["errorType"]
+    if error_type == "EXTERNAL":
+        raise exceptions.PrestoExternalError(error, query_id)
+    elif error_type == "USER_ERROR":
+        return exceptions.PrestoUserError(error, query_id)
+
+    return exceptions.PrestoQueryError(error, query_id)
+
+
+def raise_response_error(http_response):
+    if http_response.status_code == 503:
+        raise exceptions.Http503Error("error 503: service unavailable")
+
+    raise exceptions.HttpError(
+        "error {}{}".format(
+            http_response.status_code,
+            ": {}".format(http_response.content) if http_response.content else "",
+        )
+    )
+
+
+def update_client_session(client_session, headers):
+    # type: (ClientSession, Mapping[Text, Text]) -> None
+    """Apply the session changes sent by the coordinator in the response headers."""
+    if constants.HEADER_CLEAR_SESSION in headers:
+        for prop in get_header_values(headers, constants.HEADER_CLEAR_SESSION):
+            client_session.properties.pop(prop, None)
+        client_session.invalidate_http_headers()
+
+    if constants.HEADER_SET_SESSION in headers:
+        for key, value in get_session_property_values(
+            headers, constants.HEADER_SET_SESSION
+        ):
+            client_session.properties[key] = value
+        client_session.invalidate_http_headers()
+
+    if constants.HEADER_ADDED_PREPARE in headers:
+        client_session.prepared_statements = [headers[constants.HEADER_ADDED_PREPARE]]
+
+
+def process_response(client_session, headers, response):
+    # type: (ClientSession, Mapping[Text, Text], Dict[Text, Any]) -> PrestoStatus
+    """
+    Turn a decoded Presto response into a :class:`PrestoStatus`. It does not
+    depend on the HTTP library, ``headers`` only needs case-insensitive
+    lookups.
+    """
+    if "error" in response:
+        raise process_error(response["error"], response.get("id"))
+
+    update_client_session(client_session, headers)
+
+    return PrestoStatus(
+        id=response["id"],
+        stats=response["stats"],
+        warnings=response.get("warnings", []),
+        info_uri=response["infoUri"],
+        next_uri=response.get("nextUri"),
+        rows=response.get("data", []),
+        columns=response.get("columns"),
+    )
+
+
+def _build_json_value(events, event, value):
+    """Build the JSON value that starts with ``(event, value)`` from ijson basic events."""
+    if event != "start_map" and event != "start_array":
+        return value
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for event, value in events:
+        builder.event(event, value)
+        if event == "start_map" or event == "start_array":
+            depth += 1
+        elif event == "end_map" or event == "end_array":
+            depth -= 1
+            if depth == 0:
+                return builder.value
+
+
+def _read_json_fields(events, fields):
+    """
+    Read the top-level fields of a JSON object into ``fields`` until the
+    ``data`` key or the end of the object. Return whether ``data`` was reached.
+    """
+    for event, key in events:
+        if event == "end_map":
+            return False
+        if key == "data":
+            return True
+        event, value = next(events)
+        fields[key] = _build_json_value(events, event, value)
+    return False
+
+
+def _iter_json_rows(events):
+    """Yield the items of the JSON array that starts at the next event."""
+    event, _ = next(events)
+    if event != "start_array":  # "data": null
+        return
+    for event, value in events:
+        if event == "end_array":
+            return
+        yield _build_json_value(events, event, value)
+
+
 class PrestoStatus(object):
     def __init__(self, id, stats, warnings, info_uri, next_uri, rows, columns=None):
         self.id = id
@@ -127,7 +452,7 @@ class PrestoStatus(object):
                 len(self.warnings),
                 self.info_uri,
                 self.next_uri,
-                len(self.rows),
+                len(self.rows) if isinstance(self.rows, list) else "?",
             )
         )
 
@@ -168,6 +493,17 @@ class PrestoRequest(object):
     :request_timeout: How long (in seconds) to wait for the server to send
                       data before giving up, as a float or a
                       ``(connect timeout, read timeout)`` tuple.
+    :pool_maxsize: maximum number of connections kept alive per host by the
+                   HTTP session created when *http_session* is ``None``.
+    :http_compression: let the coordinator compress the responses of the HTTP
+                       session created when *http_session* is ``None``.
+                       ``False`` saves the client the CPU time spent on
+                       decompressing them.
+    :streaming: decode the rows of each response with ``ijson`` while they
+                are read from the socket instead of loading the whole page in
+                memory. :attr:`PrestoStatus.rows` is then an iterator and the
+                trailing ``stats`` are only known once it is exhausted.
+                Requires the ``ijson`` package.
 
     The client initiates a query by sending an HTTP POST to the
     coordinator. It then gets a response back from the coordinator with:
@@ -217,8 +553,14 @@ class PrestoRequest(object):
         request_timeout=constants.DEFAULT_REQUEST_TIMEOUT,  # type: Union[float, Tuple[float, float]]
         handle_retry=exceptions.RetryWithExponentialBackoff(),
         service_account_file=None,
+        streaming=False,  # type: bool
+        pool_maxsize=constants.DEFAULT_POOL_MAXSIZE,  # type: int
+        http_compression=True,  # type: bool
     ):
         # type: (...) -> None
+        if streaming and ijson is None:
+            raise RuntimeError("unable to import ijson")
+        self._streaming = streaming
         self._client_session = client_session
         self._host = host
         self._port = port
@@ -227,8 +569,7 @@ class PrestoRequest(object):
         if http_session is not None:
             self._http_session = http_session
         else:
-            # mypy cannot follow module import
-            self._http_session = self.http.Session()  # type: ignore
+            self._http_session = self.create_http_session(pool_maxsize, http_compression)
 
         self.credentials = None
         self.auth_req = None
@@ -242,7 +583,6 @@ class PrestoRequest(object):
             )
             self._http_session.headers.update(self.get_oauth_token())
 
-        self.prepared_statements = []
         self._http_session.headers.update(self.http_headers)
         self._exceptions = self.HTTP_EXCEPTIONS
         self._auth = auth
@@ -258,6 +598,35 @@ class PrestoRequest(object):
         self.max_attempts = max_attempts
         self._http_scheme = http_scheme
 
+    @classmethod
+    def create_http_session(
+        cls,
+        pool_maxsize=constants.DEFAULT_POOL_MAXSIZE,  # type: int
+        http_compression=True,  # type: bool
+    ):
+        # type: (...) -> requests.Session
+        """
+        Create an HTTP session whose connection pool keeps up to
+        *pool_maxsize* connections alive per host, so that concurrent
+        queries sharing the session do not open a new connection each.
+
+        With *http_compression*, the session accepts every content encoding
+        that ``urllib3`` can decode, which includes ``br`` and ``zstd`` when
+        the ``brotli`` and ``zstandard`` packages are installed. Otherwise it
+        asks for uncompressed responses.
+        """
+        # mypy cannot follow module import
+        http_session = cls.http.Session()  # type: ignore
+        if http_compression:
+            accept_encoding = cls.http.utils.DEFAULT_ACCEPT_ENCODING  # type: ignore
+        else:
+            accept_encoding = "identity"
+        http_session.headers["Accept-Encoding"] = accept_encoding
+        adapter = cls.http.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)  # type: ignore
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
+        return http_session
+
     @property
     def transaction_id(self):
         return self._client_session.transaction_id
@@ -267,33 +636,17 @@ class PrestoRequest(object):
         self._client_session.transaction_id = value
 
     @property
-    def http_headers(self):
-        # type: () -> Dict[Text, Text]
-        headers = {}
+    def prepared_statements(self):
+        return self._client_session.prepared_statements
 
-        headers[constants.HEADER_CATALOG] = self._client_session.catalog
-        headers[constants.HEADER_SCHEMA] = self._client_session.schema
-        headers[constants.HEADER_SOURCE] = self._client_session.source
-        headers[constants.HEADER_USER] = self._client_session.user
-        if len(self.prepared_statements) > 0:
-            headers[constants.HEADER_PREPARED_STATEMENT] = ",".join(self.prepared_statements)
-
-        headers[constants.HEADER_SESSION] = ",".join(
-            # ``name`` must not contain ``=``
-            "{}={}".format(name, parse.quote(str(value)))
-            for name, value in self._client_session.properties.items()
-        )
+    @prepared_statements.setter
+    def prepared_statements(self, value):
+        self._client_session.prepared_statements = value
 
-        # merge custom http headers
-        for key in self._client_session.headers:
-            if key in headers.keys():
-                raise ValueError("cannot override reserved HTTP header {}".format(key))
-        headers.update(self._client_session.headers)
-
-        transaction_id = self._client_session.transaction_id
-        headers[constants.HEADER_TRANSACTION] = transaction_id
-
-        return headers
+    @property
+    def http_headers(self):
+        # type: () -> Dict[Text, Text]
+        return self._client_session.http_headers
 
     @property
     def max_attempts(self):
@@ -304,9 +657,14 @@ class PrestoRequest(object):
     def max_attempts(self, value):
         # type: (int) -> None
         self._max_attempts = value
+        get = self._http_session.get
+        post = self._http_session.post
+        if not self._streaming:
+            get = read_content(get)
+            post = read_content(post)
         if value == 1:  # No retry
-            self._get = self._http_session.get
-            self._post = self._http_session.post
+            self._get = get
+            self._post = post
             self._delete = self._http_session.delete
             return
 
@@ -320,8 +678,8 @@ class PrestoRequest(object):
             ),
             max_attempts=self._max_attempts,
         )
-        self._get = with_retry(self._http_session.get)
-        self._post = with_retry(self._http_session.post)
+        self._get = with_retry(get)
+        self._post = with_retry(post)
         self._delete = with_retry(self._http_session.delete)
 
     def get_url(self, path):
@@ -351,6 +709,7 @@ class PrestoRequest(object):
             timeout=self._request_timeout,
             allow_redirects=self._redirect_handler is None,
             proxies=PROXIES,
+            stream=True,
         )
         if self._redirect_handler is not None:
             while http_response is not None and http_response.is_redirect:
@@ -368,78 +727,121 @@ class PrestoRequest(object):
                     timeout=self._request_timeout,
                     allow_redirects=False,
                     proxies=PROXIES,
+                    stream=True,
                 )
         return http_response
 
-    def get(self, url):
+    def get(self, url, http_headers=None):
+        # type: (Text, Optional[Dict[Text, Text]]) -> requests.Response
+        """
+        Send a GET to *url*. Threads other than the one processing the
+        responses must pass the *http_headers* it read from the session.
+        """
+        if http_headers is None:
+            http_headers = self.http_headers
         return self._get(
             url,
-            headers=self.http_headers,
+            headers=http_headers,
             timeout=self._request_timeout,
             proxies=PROXIES,
+            stream=True,
         )
 
     def delete(self, url):
         return self._delete(url, timeout=self._request_timeout, proxies=PROXIES)
 
-    def _process_error(self, error, query_id):
-        error_type = error["errorType"]
-        if error_type == "EXTERNAL":
-            raise exceptions.PrestoExternalError(error, query_id)
-        elif error_type == "USER_ERROR":
-            return exceptions.PrestoUserError(error, query_id)
+    def warmup(self):
+        # type: () -> bool
+        """
+        Open a connection to the coordinator ahead of the first query.
 
-        return exceptions.PrestoQueryError(error, query_id)
+        The connection is kept alive in the pool of the HTTP session, so that
+        the first :meth:`post` does not wait for the TCP and TLS handshakes.
+        This is best effort: failures are logged and ``False`` is returned.
+        """
+        try:
+            http_response = self._http_session.head(
+                self.get_url(constants.URL_INFO_PATH),
+                timeout=self._request_timeout,
+                proxies=PROXIES,
+            )
+        except self._exceptions as e:
+            logger.debug("failed to warm up the connection: %s", e)
+            return False
+        return http_response.ok
 
     def raise_response_error(self, http_response):
-        if http_response.status_code == 503:
-            raise exceptions.Http503Error("error 503: service unavailable")
-
-        raise exceptions.HttpError(
-            "error {}{}".format(
-                http_response.status_code,
-                ": {}".format(http_response.content) if http_response.content else "",
-            )
-        )
+        raise_response_error(http_response)
 
     def process(self, http_response):
         # type: (requests.Response) -> PrestoStatus
+        if self._streaming:
+            return self.process_streaming(http_response)
+
         if not http_response.ok:
             self.raise_response_error(http_response)
 
-        http_response.encoding = "utf-8"
-        response = http_response.json()
-        if "error" in response:
-            raise self._process_error(response["error"], response.get("id"))
+        return self.process_json(http_response, decode_json(read_body(http_response)))
+
+    def process_json(self, http_response, response):
+        # type: (requests.Response, Dict[Text, Any]) -> PrestoStatus
+        """Process a successful response whose body is already decoded."""
+        status = process_response(self._client_session, http_response.headers, response)
+        self._next_uri = status.next_uri
+        return status
 
-        if constants.HEADER_CLEAR_SESSION in http_response.headers:
-            for prop in get_header_values(
-                http_response.headers, constants.HEADER_CLEAR_SESSION
-            ):
-                self._client_session.properties.pop(prop, None)
+    def process_streaming(self, http_response):
+        # type: (requests.Response) -> PrestoStatus
+        """
+        Process a response opened with ``stream=True``.
 
-        if constants.HEADER_SET_SESSION in http_response.headers:
-            for key, value in get_session_property_values(
-                http_response.headers, constants.HEADER_SET_SESSION
-            ):
-                self._client_session.properties[key] = value
+        The fields preceding ``data`` are decoded right away. Rows are decoded
+        one at a time as :attr:`PrestoStatus.rows` is iterated. Presto sends
+        ``nextUri`` and ``columns`` before ``data``, ``stats`` and ``error``
+        after it: they are merged into the status once the rows are consumed.
+        """
+        if not http_response.ok:
+            self.raise_response_error(http_response)
 
-        if constants.HEADER_ADDED_PREPARE in http_response.headers:
-            self._http_session.headers[
-                constants.HEADER_PREPARED_STATEMENT
-            ] = http_response.headers[constants.HEADER_ADDED_PREPARE]
+        http_response.raw.decode_content = True
+        events = ijson.basic_parse(http_response.raw, use_float=True)
+        next(events)  # start_map
+        response = {}  # type: Dict[Text, Any]
+        has_data = _read_json_fields(events, response)
+        if "error" in response:
+            http_response.close()
+            raise process_error(response["error"], response.get("id"))
 
+        update_client_session(self._client_session, http_response.headers)
         self._next_uri = response.get("nextUri")
 
-        return PrestoStatus(
+        status = PrestoStatus(
             id=response["id"],
-            stats=response["stats"],
+            stats=response.get("stats", {}),
             warnings=response.get("warnings", []),
             info_uri=response["infoUri"],
             next_uri=self._next_uri,
-            rows=response.get("data", []),
+            rows=[],
             columns=response.get("columns"),
         )
+        if has_data:
+            status.rows = self._stream_rows(http_response, events, status)
+        else:
+            http_response.close()
+        return status
+
+    def _stream_rows(self, http_response, events, status):
+        try:
+            for row in _iter_json_rows(events):
+                yield row
+            trailer = {}  # type: Dict[Text, Any]
+            _read_json_fields(events, trailer)
+        finally:
+            http_response.close()
+        if "error" in trailer:
+            raise process_error(trailer["error"], status.id)
+        status.stats.update(trailer.get("stats", {}))
+        status.warnings.extend(trailer.get("warnings", []))
 
     @property
     def http_session(self):
@@ -453,6 +855,64 @@ class PrestoRequest(object):
         }
 
 
+def _identity(value):
+    return value
+
+
+def _to_date(value):
+    if ciso8601 is not None:
+        return ciso8601.parse_datetime(value).date()
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _to_ts_tz(value):
+    dt, tz = value.rsplit(' ', 1)
+    if tz.startswith('+') or tz.startswith('-'):
+        if ciso8601 is not None:
+            return ciso8601.parse_datetime(dt + tz)
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f %z")
+    return _to_ts(dt).replace(tzinfo=pytz.timezone(tz))
+
+
+def _to_ts(value):
+    if ciso8601 is not None:
+        return ciso8601.parse_datetime(value)
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+
+
+def _to_time_tz(value):
+    matches = TIME_TZ_RE.match(value)
+    assert matches is not None
+    assert len(matches.groups()) == 4
+    if matches.group(2) == '-':
+        tz = -timedelta(hours=int(matches.group(3)), minutes=int(matches.group(4)))
+    else:
+        tz = timedelta(hours=int(matches.group(3)), minutes=int(matches.group(4)))
+    return datetime.strptime(matches.group(1), "%H:%M:%S.%f").time().replace(tzinfo=timezone(tz))
+
+
+def _to_time(value):
+    return datetime.strptime(value, "%H:%M:%S.%f").time()
+
+
+def _nullable(convert):
+    # type: (Callable[[Any], Any]) -> Callable[[Any], Any]
+    def convert_nullable(value):
+        return None if value is None else convert(value)
+    return convert_nullable
+
+
+# convert the non-null values of the types that are not returned as is
+_CONVERTERS = {
+    "decimal": Decimal,
+    "date": _to_date,
+    "timestamp": _to_ts,
+    "timestamp with time zone": _to_ts_tz,
+    "time": _to_time,
+    "time with time zone": _to_time_tz,
+}  # type: Dict[Text, Callable[[Any], Any]]
+
+
 class PrestoResult(object):
     """
     Represent the result of a Presto query as an iterator on rows.
@@ -466,31 +926,88 @@ class PrestoResult(object):
         self._rows = rows or []
         self._rownumber = 0
         self._experimental_python_types = experimental_python_types
+        self._converters = None  # type: Optional[List[Callable[[Any], Any]]]
+        self._iterator = None  # type: Optional[Iterator[List[Any]]]
 
     @property
     def rownumber(self):
         # type: () -> int
         return self._rownumber
 
+    def fetch_all(self):
+        # type: () -> List[List[Any]]
+        """Fetch the remaining rows of the query and return them in a list."""
+        return list(self)
+
     def __iter__(self):
+        # a single iterator, as the pages are only fetched once. Choose once
+        # between the generators rather than for each page.
+        if self._iterator is None:
+            if self._experimental_python_types:
+                self._iterator = self._iter_typed()
+            else:
+                self._iterator = self._iter_raw()
+        return self._iterator
+
+    def _iter_raw(self):
+        # type: () -> Iterator[List[Any]]
         # Initial fetch from the first POST request
         for row in self._rows:
             self._rownumber += 1
-            if not self._experimental_python_types:
-                yield row
-            else:
-                yield self._map_to_python_types(row, self._query.columns)
+            yield row
         self._rows = None
 
         # Subsequent fetches from GET requests until next_uri is empty.
-        while not self._query.is_finished():
-            rows = self._query.fetch()
-            for row in rows:
+        query = self._query
+        while not query.is_finished():
+            for row in query.fetch():
                 self._rownumber += 1
-                if not self._experimental_python_types:
-                    yield row
-                else:
-                    yield self._map_to_python_types(row, self._query.columns)
+                yield row
+
+    def _iter_typed(self):
+        # type: () -> Iterator[List[Any]]
+        for row in self._to_python_types(self._rows):
+            self._rownumber += 1
+            yield row
+        self._rows = None
+
+        query = self._query
+        while not query.is_finished():
+            for row in self._to_python_types(query.fetch()):
+                self._rownumber += 1
+                yield row
+
+    def _map_rows(self, rows):
+        # type: (Iterable[List[Any]]) -> Iterable[List[Any]]
+        if not self._experimental_python_types:
+            return rows
+        return self._to_python_types(rows)
+
+    def _to_python_types(self, rows):
+        # type: (Iterable[List[Any]]) -> Iterable[List[Any]]
+        if not rows:
+            return rows
+        if isinstance(rows, list):
+            return self._map_page_to_python_types(rows, self._query.columns)
+        # streamed rows are converted one at a time to keep memory bounded
+        return (self._map_to_python_types(row, self._query.columns) for row in rows)
+
+    @classmethod
+    def _build_converter(cls, type_signature: Dict[str, Any]) -> Callable[[Any], Any]:
+        raw_type = type_signature["rawType"]
+
+        if raw_type == "array":
+            convert_item = cls._build_converter(type_signature["arguments"][0]["value"])
+            return _nullable(lambda value: [convert_item(item) for item in value])
+        convert = _CONVERTERS.get(raw_type)
+        if convert is None:
+            return _identity
+        return _nullable(convert)
+
+    @classmethod
+    def _build_converters(cls, columns: List[Dict[str, Any]]) -> List[Callable[[Any], Any]]:
+        """Compile once per query the function converting each column."""
+        return [cls._build_converter(column["typeSignature"]) for column in columns]
 
     @classmethod
     def _map_to_python_type(cls, item: Tuple[Any, Dict]) -> Any:
@@ -507,46 +1024,118 @@ class PrestoResult(object):
                     "typeSignature": data_type["typeSignature"]["arguments"][0]["value"]
                 }
                 return [cls._map_to_python_type((array_item, raw_type)) for array_item in value]
-            elif "decimal" in raw_type:
-                return Decimal(value)
-            elif raw_type == "date":
-                return datetime.strptime(value, "%Y-%m-%d").date()
-            elif raw_type == "timestamp with time zone":
-                dt, tz = value.rsplit(' ', 1)
-                if tz.startswith('+') or tz.startswith('-'):
-                    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f %z")
-                return datetime.strptime(dt, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=pytz.timezone(tz))
-            elif "timestamp" in raw_type:
-                return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
-            elif "time with time zone" in raw_type:
-                matches = re.match(r'^(.*)([\+\-])(\d{2}):(\d{2})$', value)
-                assert matches is not None
-                assert len(matches.groups()) == 4
-                if matches.group(2) == '-':
-                    tz = -timedelta(hours=int(matches.group(3)), minutes=int(matches.group(4)))
-                else:
-                    tz = timedelta(hours=int(matches.group(3)), minutes=int(matches.group(4)))
-                return datetime.strptime(matches.group(1), "%H:%M:%S.%f").time().replace(tzinfo=timezone(tz))
-            elif "time" in raw_type:
-                return datetime.strptime(value, "%H:%M:%S.%f").time()
-            else:
+            convert = _CONVERTERS.get(raw_type)
+            if convert is None:
                 return value
-        except ValueError as e:
+            return convert(value)
+        except CONVERSION_ERRORS as e:
             error_str = f"Could not convert '{value}' into the associated python type for '{raw_type}'"
-            raise prestodb/client.py (error_str) from e
+            raise exceptions.DataError(error_str) from e
+
+    def _map_page_to_python_types(
+        self, rows: List[List[Any]], columns: List[Dict[str, Any]]
+    ) -> List[List[Any]]:
+        """
+        Convert a page column by column, in place. Columns of types that
+        need no conversion, e.g. varchar or bigint, are not visited at all.
+        """
+        if self._converters is None:
+            self._converters = self._build_converters(columns)
+        try:
+            converted = [
+                (index, list(map(convert, map(itemgetter(index), rows))))
+                for index, convert in enumerate(self._converters)
+                if convert is not _identity
+            ]
+        except CONVERSION_ERRORS:
+            # convert again row by row to report the value that failed
+            return [self._map_to_python_types(row, columns) for row in rows]
+        for index, values in converted:
+            for row, value in zip(rows, values):
+                row[index] = value
+        return rows
 
     def _map_to_python_types(self, row: List[Any], columns: List[Dict[str, Any]]) -> List[Any]:
-        return list(map(self._map_to_python_type, zip(row, columns)))
+        if self._converters is None:
+            self._converters = self._build_converters(columns)
+        try:
+            return [convert(value) for convert, value in zip(self._converters, row)]
+        except CONVERSION_ERRORS:
+            # convert again cell by cell to report the value that failed
+            return list(map(self._map_to_python_type, zip(row, columns)))
+
+
+def _read_pages(request, next_uri, pages, stopped, idle_timeout, http_headers):
+    # type: (PrestoRequest, Optional[Text], queue.Queue, threading.Event, float, List[Dict[Text, Text]]) -> None
+    """
+    Get the pages of a query ahead of its consumer, from a background thread.
+
+    Put ``(http_response, response, error)`` on *pages* for each page, with
+    the decoded body of successful responses. The client session is only
+    read and updated by the consumer: each request is sent with the headers
+    it last stored in ``http_headers[0]``. Stop at the last page or at
+    the first error, when *stopped* is set, or when the consumer did not take
+    a page for *idle_timeout* seconds: the coordinator then expires an
+    abandoned query.
+    """
+    try:
+        while next_uri is not None and not stopped.is_set():
+            http_response = request.get(next_uri, http_headers[0])
+            response = None
+            next_uri = None
+            if http_response.ok:
+                response = decode_json(read_body(http_response))
+                next_uri = response.get("nextUri")
+            if not _put_page(pages, (http_response, response, None), stopped, idle_timeout):
+                return
+    except Exception as e:
+        _put_page(pages, (None, None, e), stopped, idle_timeout)
+
+
+def _put_page(pages, page, stopped, idle_timeout):
+    # type: (queue.Queue, Tuple[Any, Any, Optional[Exception]], threading.Event, float) -> bool
+    deadline = time.monotonic() + idle_timeout
+    while not stopped.is_set():
+        try:
+            pages.put(page, timeout=0.1)
+            return True
+        except queue.Full:
+            if time.monotonic() > deadline:
+                logger.debug("stop reading pages ahead of an idle consumer")
+                return False
+    return False
 
 
 class PrestoQuery(object):
-    """Represent the execution of a SQL statement by Presto."""
+    """
+    Represent the execution of a SQL statement by Presto.
+
+    :param prefetch: send the GET for the next page in a background thread
+                     as soon as its ``nextUri`` is known, so that the
+                     network round-trip overlaps with the processing of the
+                     current page. Only one request is ever in flight as each
+                     ``nextUri`` is only known once the previous page has been
+                     decoded.
+    :param prefetch_pages: when greater than 0, fetch and decode pages in a
+                           background thread, up to *prefetch_pages* ahead of
+                           the consumer, instead of one GET ahead with
+                           *prefetch*. It helps when the rows are consumed
+                           slowly. Streamed pages are read in full by the
+                           background thread. It stops reading ahead when
+                           the query is dropped, or when no page is taken for
+                           :attr:`PREFETCH_IDLE_TIMEOUT` seconds; the
+                           remaining pages are then fetched on demand.
+    """
+
+    PREFETCH_IDLE_TIMEOUT = 60.0
 
     def __init__(
         self,
         request,  # type: PrestoRequest
         sql,  # type: Text
         experimental_python_types = False,
+        prefetch=True,  # type: bool
+        prefetch_pages=0,  # type: int
     ):
         # type: (...) -> None
         self.auth_req = request.auth_req  # type: Optional[Request]
@@ -560,8 +1149,19 @@ class PrestoQuery(object):
         self._cancelled = False
         self._request = request
         self._sql = sql
+        # not read from the request, which other queries may use meanwhile
+        self._next_uri = None  # type: Optional[Text]
         self._result = PrestoResult(self, experimental_python_types=experimental_python_types)
         self._experimental_python_types = experimental_python_types
+        self._prefetch = prefetch
+        self._executor = None  # type: Optional[concurrent.futures.ThreadPoolExecutor]
+        self._next_response = None  # type: Optional[concurrent.futures.Future]
+        self._prefetch_pages = prefetch_pages
+        self._pages = None  # type: Optional[queue.Queue]
+        self._page_reader = None  # type: Optional[threading.Thread]
+        self._reader_stopped = None  # type: Optional[threading.Event]
+        # the session headers for the reader, set by the consumer
+        self._reader_headers = None  # type: Optional[List[Dict[Text, Text]]]
 
     @property
     def columns(self):
@@ -587,6 +1187,11 @@ class PrestoQuery(object):
         It sets the query_id and returns a Result object used to
         track the rows returned by the query. To fetch all rows,
         call fetch() until is_finished is true.
+
+        It blocks until the first rows are received or the query is
+        finished, so that statements without a result, like INSERT or
+        PREPARE, run to completion. Further pages are fetched as the result
+        is iterated.
         """
         if self._cancelled:
             raise exceptions.PrestoUserError("Query has been cancelled", self.query_id)
@@ -599,30 +1204,164 @@ class PrestoQuery(object):
         self.query_id = status.id
         self._stats.update({"queryId": self.query_id})
         self._stats.update(status.stats)
-        self._warnings = getattr(status, "warnings", [])
+        if status.columns:
+            self._columns = status.columns
+        self._warnings = status.warnings
+        self._next_uri = status.next_uri
         if status.next_uri is None:
             self._finished = True
-        self._result = PrestoResult(self, status.rows, self._experimental_python_types)
+        elif self._prefetch_pages > 0:
+            self._start_page_reader(status.next_uri)
+        elif self._prefetch:
+            self._prefetch_next(status.next_uri)
+        self._result = PrestoResult(
+            self, list(self._status_rows(status)), self._experimental_python_types
+        )
         while (
-            not self._finished and not self._cancelled
+            not self._finished and not self._cancelled and not self._result._rows
         ):
             self._result._rows += self.fetch()
         return self._result
 
     def fetch(self):
-        # type: () -> List[List[Any]]
+        # type: () -> Iterable[List[Any]]
         """Continue fetching data for the current query_id"""
-        if self._request.next_uri is None:
+        if self._pages is not None:
+            status = self._next_page()
+        elif self._next_response is not None:
+            # the page of self._next_uri, requested ahead. Forget it first,
+            # so that a further fetch() sends the GET again if it failed.
+            next_response, self._next_response = self._next_response, None
+            response = next_response.result()
+            status = self._request.process(response)
+        elif self._next_uri is None:
             self._finished = True
             return []
-        response = self._request.get(self._request.next_uri)
-        status = self._request.process(response)
+        else:
+            status = self._request.process(self._request.get(self._next_uri))
+        self._next_uri = status.next_uri
         if status.columns:
             self._columns = status.columns
         self._stats.update(status.stats)
         if status.next_uri is None:
             self._finished = True
-        return status.rows
+            self._stop_prefetch()
+        elif self._pages is None and self._prefetch and not self._cancelled:
+            self._prefetch_next(status.next_uri)
+        return self._status_rows(status)
+
+    def _status_rows(self, status):
+        # type: (PrestoStatus) -> Iterable[List[Any]]
+        if isinstance(status.rows, list):
+            return status.rows
+        # streamed rows, the stats are sent after them
+        return self._stream_rows(status)
+
+    def _stream_rows(self, status):
+        # type: (PrestoStatus) -> Iterator[List[Any]]
+        for row in status.rows:
+            yield row
+        self._stats.update(status.stats)
+
+    def _prefetch_next(self, next_uri):
+        # type: (Text) -> None
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="presto-prefetch"
+            )
+        # the headers are read from the session on this thread, which
+        # updates it while processing the responses
+        self._next_response = self._executor.submit(
+            self._request.get, next_uri, self._request.http_headers
+        )
+
+    def _stop_prefetch(self):
+        # type: () -> None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._next_response = None
+        if self._reader_stopped is not None:
+            self._reader_stopped.set()
+        self._pages = None
+        self._page_reader = None
+        self._reader_stopped = None
+        self._reader_headers = None
+
+    def _start_page_reader(self, next_uri):
+        # type: (Text) -> None
+        self._pages = queue.Queue(maxsize=self._prefetch_pages)
+        self._reader_stopped = threading.Event()
+        self._reader_headers = [self._request.http_headers]
+        # the reader holds no reference to the query, so that it can stop
+        # once the query is dropped without being consumed
+        self._page_reader = threading.Thread(
+            target=_read_pages,
+            args=(
+                self._request,
+                next_uri,
+                self._pages,
+                self._reader_stopped,
+                self.PREFETCH_IDLE_TIMEOUT,
+                self._reader_headers,
+            ),
+            name="presto-prefetch",
+            daemon=True,
+        )
+        weakref.finalize(self, self._reader_stopped.set)
+        self._page_reader.start()
+
+    def _next_page(self):
+        # type: () -> PrestoStatus
+        while True:
+            try:
+                http_response, response, error = self._pages.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self._page_reader.is_alive() and self._pages.empty():
+                    # the reader gave up on an idle consumer
+                    self._stop_prefetch()
+                    return self._request.process(self._request.get(self._next_uri))
+        if error is not None:
+            # a further fetch() retries the failed page without the reader
+            self._stop_prefetch()
+            raise error
+        if response is None:
+            self._stop_prefetch()
+            self._request.raise_response_error(http_response)
+        status = self._request.process_json(http_response, response)
+        self._reader_headers[0] = self._request.http_headers
+        return status
+
+    def fetch_arrow(self):
+        # type: () -> Iterator[Any]
+        """
+        Yield the rows of the query as one ``pyarrow.RecordBatch`` per page.
+        The values are converted column by column by Arrow, without creating
+        a Python object per value. All the batches share one schema and at
+        least one batch is yielded, empty if the query returned no rows. Call
+        it after :meth:`execute`, instead of iterating its result. Requires
+        the ``pyarrow`` package.
+        """
+        try:
+            from prestodb import arrow
+        except ImportError:
+            raise RuntimeError("unable to import pyarrow")
+
+        schema = None
+        rows = self._result._rows or []
+        self._result._rows = []
+        while True:
+            rows = list(rows)
+            if rows:
+                if schema is None:
+                    schema = arrow.to_arrow_schema(self._columns)
+                yield arrow.to_record_batch(rows, self._columns, schema)
+            if self.is_finished() or self._cancelled:
+                break
+            rows = self.fetch()
+        if schema is None:
+            yield arrow.to_record_batch([], self._columns or [])
 
     def cancel(self):
         # type: () -> None
@@ -631,6 +1370,7 @@ class PrestoQuery(object):
             return
 
         self._cancelled = True
+        self._stop_prefetch()
         url = self._request.get_url("/v1/query/{}".format(self.query_id))
         logger.debug("cancelling query: %s", self.query_id)
         response = self._request.delete(url)
@@ -23,11 +23,13 @@ DEFAULT_SCHEMA = None  # type: Optional[Text]
 DEFAULT_AUTH = None  # type: Optional[Any]
 DEFAULT_MAX_ATTEMPTS = 3
 DEFAULT_REQUEST_TIMEOUT = 30.0  # type: float
+DEFAULT_POOL_MAXSIZE = 32
 
 HTTP = "http"
 HTTPS = "https"
 
 URL_STATEMENT_PATH = "/v1/statement"
+URL_INFO_PATH = "/v1/info"
 
 HEADER_PREFIX = "X-Presto-"
 HEADER_CATALOG = HEADER_PREFIX + "Catalog"
@@ -78,6 +78,8 @@ class Connection(object):
         request_timeout=constants.DEFAULT_REQUEST_TIMEOUT,
         isolation_level=IsolationLevel.AUTOCOMMIT,
         experimental_python_types=False,
+        pool_maxsize=constants.DEFAULT_POOL_MAXSIZE,
+        http_compression=True,
         **kwargs,
     ):
         self.host = host
@@ -96,8 +98,9 @@ class Connection(object):
             http_headers,
             NO_TRANSACTION,
         )
-        # mypy cannot follow module import
-        self._http_session = prestodb.client.PrestoRequest.http.Session()
+        self._http_session = prestodb.client.PrestoRequest.create_http_session(
+            pool_maxsize, http_compression
+        )
         self.http_headers = http_headers
         self.http_scheme = http_scheme
         self.auth = auth
@@ -30,7 +30,26 @@ kerberos_require = ["requests_kerberos"]
 
 google_auth_require = ["google_auth"]
 
-all_require = [require, kerberos_require, google_auth_require]
+ciso8601_require = ["ciso8601"]
+
+streaming_require = ["ijson>=3.1"]
+
+orjson_require = ["orjson"]
+
+async_require = ["httpx[http2]>=0.26"]
+
+arrow_require = ["pyarrow"]
+
+all_require = [
+    require,
+    kerberos_require,
+    google_auth_require,
+    ciso8601_require,
+    streaming_require,
+    orjson_require,
+    async_require,
+    arrow_require,
+]
 
 tests_require = all_require + ["httpretty", "pytest", "pytest-runner"]
 
@@ -77,6 +96,11 @@ setup(
         "all": all_require,
         "kerberos": kerberos_require,
         "google_auth": google_auth_require,
+        "ciso8601": ciso8601_require,
+        "streaming": streaming_require,
+        "orjson": orjson_require,
+        "async": async_require,
+        "arrow": arrow_require,
         "tests": tests_require,
         ':python_version=="2.7"': py27_require,
     },
@@ -0,0 +1,172 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from prestodb import constants  # NOQA: E402
+from prestodb.aclient import AsyncPrestoQuery, AsyncPrestoRequest  # NOQA: E402
+from prestodb.client import ClientSession  # NOQA: E402
+import prestodb.exceptions  # NOQA: E402
+
+
+def page_url(index, query_id="test_query"):
+    return "http://coordinator:8080/v1/statement/{}/{}".format(query_id, index)
+
+
+def make_transport(pages, requests, status_codes=None, queries=None):
+    """
+    Serve *pages*, or the pages of the query in *queries* whose id is the
+    posted statement.
+    """
+    status_codes = list(status_codes or [])
+    if queries is None:
+        queries = {"test_query": pages}
+
+    def handler(request):
+        requests.append(request)
+        if status_codes:
+            return httpx.Response(status_codes.pop(0))
+        if request.method == "POST":
+            query_id = request.content.decode("utf-8")
+            if query_id not in queries:
+                query_id = "test_query"
+            index = 0
+        else:
+            query_id, index = str(request.url).rsplit("/", 2)[1:]
+            index = int(index)
+        query_pages = queries[query_id]
+        body = {
+            "id": query_id,
+            "infoUri": "http://coordinator:8080/query.html?{}".format(query_id),
+            "data": query_pages[index],
+            "stats": {"state": "RUNNING"},
+        }
+        if index + 1 < len(query_pages):
+            body["nextUri"] = page_url(index + 1, query_id)
+        headers = {}
+        if index == 0:
+            headers[constants.HEADER_SET_SESSION] = "a=1"
+        return httpx.Response(200, json=body, headers=headers)
+
+    return httpx.MockTransport(handler)
+
+
+def test_async_query_fetch_pages():
+    pages = [[], [[1], [2]], [[3]]]
+    requests = []
+    client_session = ClientSession(user="test", catalog="test_catalog")
+
+    async def run():
+        http_client = httpx.AsyncClient(transport=make_transport(pages, requests))
+        async with AsyncPrestoRequest(
+            host="coordinator", port=8080, client_session=client_session, http_client=http_client
+        ) as req:
+            query = AsyncPrestoQuery(req, "SELECT 1")
+            result = await query.execute()
+            rows = await result.fetch_all()
+        await http_client.aclose()
+        return query, rows
+
+    query, rows = asyncio.run(run())
+
+    assert rows == [[1], [2], [3]]
+    assert query.is_finished()
+    assert [str(request.url) for request in requests[1:]] == [page_url(1), page_url(2)]
+    assert requests[0].headers[constants.HEADER_CATALOG] == "test_catalog"
+    assert client_session.properties == {"a": "1"}
+    assert requests[1].headers[constants.HEADER_SESSION] == "a=1"
+
+
+def test_async_result_fetch_all_after_partial_iteration():
+    pages = [[[1], [2]], [[3]]]
+    requests = []
+
+    async def run():
+        http_client = httpx.AsyncClient(transport=make_transport(pages, requests))
+        req = AsyncPrestoRequest(
+            host="coordinator",
+            port=8080,
+            client_session=ClientSession(user="test"),
+            http_client=http_client,
+        )
+        result = await AsyncPrestoQuery(req, "SELECT 1").execute()
+        first_row = await result.__aiter__().__anext__()
+        rows = await result.fetch_all()
+        await http_client.aclose()
+        return first_row, rows
+
+    assert asyncio.run(run()) == ([1], [[2], [3]])
+
+
+def test_async_queries_share_request():
+    queries = {
+        "query_a": [[["a1"]], [["a2"]], [["a3"]]],
+        "query_b": [[["b1"]], [["b2"]]],
+    }
+    requests = []
+
+    async def fetch_slowly(query):
+        rows = []
+        async for row in await query.execute():
+            rows.append(row)
+            # let the other query send its requests meanwhile
+            await asyncio.sleep(0)
+        return rows
+
+    async def run():
+        http_client = httpx.AsyncClient(
+            transport=make_transport(None, requests, queries=queries)
+        )
+        req = AsyncPrestoRequest(
+            host="coordinator",
+            port=8080,
+            client_session=ClientSession(user="test"),
+            http_client=http_client,
+        )
+        rows = await asyncio.gather(
+            fetch_slowly(AsyncPrestoQuery(req, "query_a")),
+            fetch_slowly(AsyncPrestoQuery(req, "query_b")),
+        )
+        await http_client.aclose()
+        return rows
+
+    assert asyncio.run(run()) == [[["a1"], ["a2"], ["a3"]], [["b1"], ["b2"]]]
+
+
+def test_async_request_503_retry():
+    requests = []
+    attempts = 3
+
+    async def run():
+        http_client = httpx.AsyncClient(
+            transport=make_transport([[]], requests, status_codes=[503] * attempts)
+        )
+        req = AsyncPrestoRequest(
+            host="coordinator",
+            port=8080,
+            client_session=ClientSession(user="test"),
+            http_client=http_client,
+            max_attempts=attempts,
+            retry_delay=lambda attempt: 0,
+        )
+        response = await req.post("SELECT 1")
+        await http_client.aclose()
+        return req, response
+
+    req, response = asyncio.run(run())
+
+    assert len(requests) == attempts
+    with pytest.raises(prestodb.exceptions.Http503Error):
+        req.process(response)
@@ -14,16 +14,27 @@ from __future__ import division
 from __future__ import print_function
 
 import httpretty
+import gc
+import gzip
+import http.client
+import io
+import json
 import pytest
 import requests
+import urllib3
 import socket
+import threading
 import time
+from datetime import date, datetime, time as datetime_time, timedelta, timezone
+from decimal import Decimal
 
 from requests_kerberos.exceptions import KerberosExchangeError
-from prestodb.client import ClientSession, PrestoRequest
+from prestodb.client import ClientSession, PrestoQuery, PrestoRequest
 from prestodb.auth import KerberosAuthentication
 from prestodb import constants
+import prestodb.client
 import prestodb.exceptions
+import six.moves.urllib_parse as parse
 
 
 """
@@ -252,21 +263,15 @@ RESP_ERROR_GET_0 = {
 }
 
 
-def get_json_post_0(self):
-    return RESP_DATA_POST_0
+def make_http_response(body, status_code=200):
+    http_response = PrestoRequest.http.Response()
+    http_response.status_code = status_code
+    http_response._content = json.dumps(body).encode("utf-8")
+    http_response.raw = io.BytesIO(http_response._content)
+    return http_response
 
 
-def get_json_get_0(self):
-    return RESP_DATA_GET_0
-
-
-def get_json_get_error_0(self):
-    return RESP_ERROR_GET_0
-
-
-def test_presto_initial_request(monkeypatch):
-    monkeypatch.setattr(PrestoRequest.http.Response, "json", get_json_post_0)
-
+def test_presto_initial_request():
     req = PrestoRequest(
         host="coordinator",
         port=8080,
@@ -280,8 +285,7 @@ def test_presto_initial_request(monkeypatch):
         http_scheme="http"
     )
 
-    http_resp = PrestoRequest.http.Response()
-    http_resp.status_code = 200
+    http_resp = make_http_response(RESP_DATA_POST_0)
     status = req.process(http_resp)
 
     assert status.next_uri == RESP_DATA_POST_0["nextUri"]
@@ -351,6 +355,114 @@ def test_request_headers(monkeypatch):
     assert_headers(get_recorder.kwargs["headers"])
 
 
+def test_request_headers_cache():
+    client_session = ClientSession(user="test", properties={"a": "1"})
+    req = PrestoRequest(host="coordinator", port=8080, client_session=client_session)
+
+    headers = req.http_headers
+    assert req.http_headers is headers
+    assert headers[constants.HEADER_SESSION] == "a=1"
+
+    http_resp = make_http_response(RESP_DATA_POST_0)
+    http_resp.headers[constants.HEADER_SET_SESSION] = "b=2"
+    http_resp.headers[constants.HEADER_ADDED_PREPARE] = "st_1=SELECT+1"
+    req.process(http_resp)
+
+    headers = req.http_headers
+    assert headers[constants.HEADER_SESSION] == "a=1,b=2"
+    assert headers[constants.HEADER_PREPARED_STATEMENT] == "st_1=SELECT+1"
+
+    req.transaction_id = "txn"
+    assert req.http_headers[constants.HEADER_TRANSACTION] == "txn"
+
+
+def test_request_headers_cache_invalidation():
+    session_properties = {"a": "1"}
+    client_session = ClientSession(user="test", schema="s1", properties=session_properties)
+    req = PrestoRequest(host="coordinator", port=8080, client_session=client_session)
+    assert req.http_headers[constants.HEADER_SCHEMA] == "s1"
+
+    client_session.schema = "s2"
+    client_session.catalog = "c2"
+    client_session.user = "u2"
+    client_session.source = "src2"
+    headers = req.http_headers
+    assert headers[constants.HEADER_SCHEMA] == "s2"
+    assert headers[constants.HEADER_CATALOG] == "c2"
+    assert headers[constants.HEADER_USER] == "u2"
+    assert headers[constants.HEADER_SOURCE] == "src2"
+
+    # changed in place, like the session_properties of a dbapi connection
+    session_properties["b"] = "2"
+    client_session.headers["X-Custom"] = "v"
+    headers = req.http_headers
+    assert headers[constants.HEADER_SESSION] == "a=1,b=2"
+    assert headers["X-Custom"] == "v"
+
+
+def test_request_http_session_pool():
+    req = PrestoRequest(
+        host="coordinator", port=8080, client_session=ClientSession(user="test"), pool_maxsize=64
+    )
+    for url in ("http://coordinator:8080", "https://coordinator:8443"):
+        assert req.http_session.get_adapter(url)._pool_maxsize == 64
+
+
+@pytest.mark.parametrize(
+    "http_compression, accept_encoding",
+    [(True, requests.utils.DEFAULT_ACCEPT_ENCODING), (False, "identity")],
+)
+def test_request_http_compression(http_compression, accept_encoding):
+    req = PrestoRequest(
+        host="coordinator",
+        port=8080,
+        client_session=ClientSession(user="test"),
+        http_compression=http_compression,
+    )
+    prepared_request = req.http_session.prepare_request(
+        requests.Request("GET", "http://coordinator:8080", headers=req.http_headers)
+    )
+    assert prepared_request.headers["Accept-Encoding"] == accept_encoding
+
+
+def test_request_warmup(monkeypatch):
+    urls = []
+
+    def head(self, url, **kwargs):
+        urls.append(url)
+        return make_http_response({})
+
+    monkeypatch.setattr(PrestoRequest.http.Session, "head", head)
+    req = PrestoRequest(host="coordinator", port=8080, client_session=ClientSession(user="test"))
+
+    assert req.warmup() is True
+    assert urls == ["http://coordinator:8080/v1/info"]
+
+    def raise_connection_error(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("coordinator is down")
+
+    monkeypatch.setattr(PrestoRequest.http.Session, "head", raise_connection_error)
+    assert req.warmup() is False
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "hive", "query_max-run.time/5m~", "1h 30m", "a:b", "a+b", "é", "a\n", "50%"],
+)
+def test_quote_header_value(value):
+    assert prestodb.client.quote_header_value(value) == parse.quote(value)
+
+
+def test_request_headers_without_session_properties():
+    req = PrestoRequest(host="coordinator", port=8080, client_session=ClientSession(user="test"))
+
+    prepared_request = req.http_session.prepare_request(
+        requests.Request("GET", "http://coordinator:8080", headers=req.http_headers)
+    )
+    assert constants.HEADER_SESSION not in prepared_request.headers
+    assert prepared_request.headers[constants.HEADER_USER] == "test"
+
+
 def test_request_invalid_http_headers():
     with pytest.raises(ValueError) as value_error:
         PrestoRequest(
@@ -400,9 +512,7 @@ def test_request_timeout():
     httpretty.reset()
 
 
-def test_presto_fetch_request(monkeypatch):
-    monkeypatch.setattr(PrestoRequest.http.Response, "json", get_json_get_0)
-
+def test_presto_fetch_request():
     req = PrestoRequest(
         host="coordinator",
         port=8080,
@@ -415,8 +525,7 @@ def test_presto_fetch_request(monkeypatch):
         http_scheme="http",
     )
 
-    http_resp = PrestoRequest.http.Response()
-    http_resp.status_code = 200
+    http_resp = make_http_response(RESP_DATA_GET_0)
     status = req.process(http_resp)
 
     assert status.next_uri == RESP_DATA_GET_0["nextUri"]
@@ -424,9 +533,57 @@ def test_presto_fetch_request(monkeypatch):
     assert status.rows == RESP_DATA_GET_0["data"]
 
 
-def test_presto_fetch_error(monkeypatch):
-    monkeypatch.setattr(PrestoRequest.http.Response, "json", get_json_get_error_0)
+def test_request_reads_content_while_sending():
+    url = "http://coordinator:8080/v1/statement/test_query/1"
+    httpretty.enable()
+    httpretty.register_uri(httpretty.GET, url, body=json.dumps(RESP_DATA_GET_0))
+
+    req = PrestoRequest(host="coordinator", port=8080, client_session=ClientSession(user="test"))
+    http_resp = req.get(url)
+    httpretty.disable()
+    httpretty.reset()
+
+    # the response is streamed, yet its body was read within get()
+    req.http_session.close()
+    status = req.process(http_resp)
+
+    assert status.rows == RESP_DATA_GET_0["data"]
+    assert status.next_uri == RESP_DATA_GET_0["nextUri"]
+
+
+def make_streamed_response(body, headers=None):
+    http_response = PrestoRequest.http.Response()
+    http_response.status_code = 200
+    http_response.raw = urllib3.HTTPResponse(
+        body=body, headers=headers, status=200, preload_content=False
+    )
+    return http_response
+
+
+def test_read_content_decodes_body():
+    content = json.dumps(RESP_DATA_GET_0).encode("utf-8")
+    http_resp = make_streamed_response(
+        io.BytesIO(gzip.compress(content)), headers={"Content-Encoding": "gzip"}
+    )
+
+    http_resp = prestodb.client.read_content(lambda *args, **kwargs: http_resp)("url")
+
+    assert prestodb.client.read_body(http_resp) == content
+    assert http_resp.json() == RESP_DATA_GET_0
+
+
+def test_read_content_error():
+    class TruncatedBody(io.BytesIO):
+        def read(self, *args):
+            raise http.client.IncompleteRead(b"{", 10)
+
+    http_resp = make_streamed_response(TruncatedBody())
 
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        prestodb.client.read_content(lambda *args, **kwargs: http_resp)("url")
+
+
+def test_presto_fetch_error():
     req = PrestoRequest(
         host="coordinator",
         port=8080,
@@ -439,8 +596,7 @@ def test_presto_fetch_error(monkeypatch):
         http_scheme="http",
     )
 
-    http_resp = PrestoRequest.http.Response()
-    http_resp.status_code = 200
+    http_resp = make_http_response(RESP_ERROR_GET_0)
     with pytest.raises(prestodb.exceptions.PrestoUserError) as exception_info:
         req.process(http_resp)
     error = exception_info.value
@@ -589,3 +745,414 @@ def test_gateway_redirect(monkeypatch):
     result = req.post("http://host:80/path/")
     assert gateway_response.count == 3
     assert result.ok
+
+
+class FakePagedQuery(object):
+    """Serve a query result split into pages chained by ``nextUri``."""
+
+    def __init__(self, pages, columns=None, query_id="test_query"):
+        self.__name__ = "FakePagedQuery"
+        self.urls = []
+        self.query_id = query_id
+        self._responses = {}
+        for index, rows in enumerate(pages):
+            # same field order as the Presto coordinator
+            body = {
+                "id": query_id,
+                "infoUri": "http://coordinator:8080/query.html?{}".format(query_id),
+            }
+            if index + 1 < len(pages):
+                body["nextUri"] = self.url(index + 1, query_id)
+            if columns is not None:
+                body["columns"] = columns
+            body["data"] = rows
+            body["stats"] = {"state": "RUNNING", "page": index}
+            self._responses[self.url(index, query_id)] = body
+
+    @staticmethod
+    def url(index, query_id="test_query"):
+        return "http://coordinator:8080/v1/statement/{}/{}".format(query_id, index)
+
+    def __call__(self, url, *args, **kwargs):
+        if url.endswith(constants.URL_STATEMENT_PATH):
+            url = self.url(0, self.query_id)
+        self.urls.append(url)
+        return make_http_response(self._responses[url])
+
+
+def serve_paged_query(monkeypatch, pages, columns=None, **kwargs):
+    """
+    Serve *pages* to the requests sessions and return the fake query with a
+    request to the coordinator, created with the extra *kwargs*.
+    """
+    fake_query = FakePagedQuery(pages, columns=columns)
+    monkeypatch.setattr(PrestoRequest.http.Session, "post", fake_query)
+    monkeypatch.setattr(PrestoRequest.http.Session, "get", fake_query)
+    kwargs.setdefault("client_session", ClientSession(user="test"))
+    return fake_query, PrestoRequest(host="coordinator", port=8080, **kwargs)
+
+
+class FakeCoordinator(object):
+    """Serve several paged queries, in the order their statements are posted."""
+
+    def __init__(self, *queries):
+        self.__name__ = "FakeCoordinator"
+        self._queries = queries
+        self._posted = 0
+
+    def __call__(self, url, *args, **kwargs):
+        if url.endswith(constants.URL_STATEMENT_PATH):
+            query = self._queries[self._posted]
+            self._posted += 1
+        else:
+            query = next(query for query in self._queries if url in query._responses)
+        return query(url, *args, **kwargs)
+
+
+@pytest.mark.parametrize("prefetch, prefetch_pages", [(True, 0), (False, 0), (True, 2)])
+def test_query_fetch_pages(monkeypatch, prefetch, prefetch_pages):
+    pages = [[], [[1], [2]], [], [[3]]]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    query = PrestoQuery(req, "SELECT 1", prefetch=prefetch, prefetch_pages=prefetch_pages)
+
+    assert list(query.execute()) == [[1], [2], [3]]
+    assert query.is_finished()
+    assert query.stats["page"] == len(pages) - 1
+    assert fake_query.urls == [FakePagedQuery.url(i) for i in range(len(pages))]
+
+
+@pytest.mark.parametrize("prefetch, prefetch_pages", [(True, 0), (False, 0), (False, 2)])
+def test_query_fetch_retries_failed_page(monkeypatch, prefetch, prefetch_pages):
+    fake_query = FakePagedQuery([[[0]], [[1]], [[2]]])
+    failures = [FakePagedQuery.url(1)]
+
+    def get(self, url, *args, **kwargs):
+        if url in failures:
+            failures.remove(url)
+            raise requests.exceptions.ConnectionError("connection reset")
+        return fake_query(url, *args, **kwargs)
+
+    monkeypatch.setattr(PrestoRequest.http.Session, "post", fake_query)
+    monkeypatch.setattr(PrestoRequest.http.Session, "get", get)
+
+    req = PrestoRequest(
+        host="coordinator", port=8080, client_session=ClientSession(user="test"), max_attempts=1
+    )
+    query = PrestoQuery(req, "SELECT 1", prefetch=prefetch, prefetch_pages=prefetch_pages)
+    query.execute()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        query.fetch()
+    assert list(query.fetch()) == [[1]]
+    assert list(query.fetch()) == [[2]]
+    assert query.is_finished()
+
+
+def test_query_prefetch_pages_error(monkeypatch):
+    pages = [[], [[1], [2]], [], [[3]]]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    fake_query._responses[FakePagedQuery.url(2)] = RESP_ERROR_GET_0
+    query = PrestoQuery(req, "SELECT 1", prefetch_pages=2)
+    result = iter(query.execute())
+
+    assert [next(result), next(result)] == [[1], [2]]
+    with pytest.raises(prestodb.exceptions.PrestoUserError):
+        next(result)
+    assert fake_query.urls == [FakePagedQuery.url(i) for i in range(3)]
+
+
+def prefetch_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "presto-prefetch"]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_query_prefetch_pages_abandoned(monkeypatch):
+    pages = [[[index]] for index in range(10)]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    query = PrestoQuery(req, "SELECT 1", prefetch_pages=2)
+    result = iter(query.execute())
+    assert next(result) == [0]
+    assert wait_for(lambda: len(fake_query.urls) == 4)
+
+    # like fetchone() on a cursor that is then dropped
+    del query, result
+    gc.collect()
+    assert wait_for(lambda: not prefetch_threads())
+    assert len(fake_query.urls) == 4
+
+
+def test_query_prefetch_pages_idle_consumer(monkeypatch):
+    pages = [[[index]] for index in range(6)]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    query = PrestoQuery(req, "SELECT 1", prefetch_pages=1)
+    query.PREFETCH_IDLE_TIMEOUT = 0.1
+    result = iter(query.execute())
+    assert next(result) == [0]
+    assert wait_for(lambda: not prefetch_threads())
+
+    # the page the reader gave up on is fetched again
+    assert list(result) == [[index] for index in range(1, 6)]
+    assert query.is_finished()
+
+
+@pytest.mark.parametrize("prefetch, prefetch_pages", [(True, 0), (False, 0), (False, 2)])
+def test_query_interleaved_on_shared_request(monkeypatch, prefetch, prefetch_pages):
+    query_a = FakePagedQuery([[[1]], [[2]]], query_id="query_a")
+    query_b = FakePagedQuery([[["b"]]], query_id="query_b")
+    coordinator = FakeCoordinator(query_a, query_b)
+    monkeypatch.setattr(PrestoRequest.http.Session, "post", coordinator)
+    monkeypatch.setattr(PrestoRequest.http.Session, "get", coordinator)
+
+    req = PrestoRequest(host="coordinator", port=8080, client_session=ClientSession(user="test"))
+    result = PrestoQuery(
+        req, "SELECT a", prefetch=prefetch, prefetch_pages=prefetch_pages
+    ).execute()
+    # like dbapi.Cursor running DEALLOCATE PREPARE before the rows are read
+    assert list(PrestoQuery(req, "SELECT b", prefetch=prefetch).execute()) == [["b"]]
+
+    assert list(result) == [[1], [2]]
+    assert query_a.urls == [FakePagedQuery.url(i, "query_a") for i in range(2)]
+
+
+class RecordingClientSession(ClientSession):
+    """Record the threads reading the session headers."""
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingClientSession, self).__init__(*args, **kwargs)
+        self.threads = set()
+
+    @property
+    def http_headers(self):
+        self.threads.add(threading.current_thread())
+        return super(RecordingClientSession, self).http_headers
+
+
+@pytest.mark.parametrize("prefetch, prefetch_pages", [(True, 0), (False, 2)])
+def test_query_prefetch_reads_headers_on_consumer(monkeypatch, prefetch, prefetch_pages):
+    pages = [[[index]] for index in range(4)]
+    client_session = RecordingClientSession(user="test", schema="first")
+    fake_query, req = serve_paged_query(monkeypatch, pages, client_session=client_session)
+    result = iter(
+        PrestoQuery(req, "SELECT 1", prefetch=prefetch, prefetch_pages=prefetch_pages).execute()
+    )
+    assert next(result) == [0]
+    client_session.schema = "second"
+    assert list(result) == [[1], [2], [3]]
+
+    assert client_session.threads == {threading.current_thread()}
+
+
+def test_result_fetch_all_after_partial_iteration(monkeypatch):
+    pages = [[[0], [1]], [[2]], [[3]], [[4]]]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    result = PrestoQuery(req, "SELECT 1").execute()
+
+    assert next(iter(result)) == [0]
+    assert [next(iter(result)), next(iter(result))] == [[1], [2]]
+    assert result.fetch_all() == [[3], [4]]
+    assert result.rownumber == 5
+    assert result.fetch_all() == []
+
+
+def test_query_execute_is_lazy(monkeypatch):
+    pages = [[], [[1], [2]], [], [[3]]]
+    fake_query, req = serve_paged_query(monkeypatch, pages)
+    query = PrestoQuery(req, "SELECT 1", prefetch=False)
+
+    result = query.execute()
+    assert fake_query.urls == [FakePagedQuery.url(0), FakePagedQuery.url(1)]
+    assert not query.is_finished()
+
+    assert result.fetch_all() == [[1], [2], [3]]
+    assert query.is_finished()
+    assert fake_query.urls == [FakePagedQuery.url(i) for i in range(len(pages))]
+
+
+@pytest.mark.parametrize("prefetch_pages", [0, 2])
+def test_query_fetch_pages_streaming(monkeypatch, prefetch_pages):
+    pytest.importorskip("ijson")
+    pages = [[], [[1, "a"], [2, None]], [], [[3, [1.5, {"k": True}]]]]
+    fake_query, req = serve_paged_query(monkeypatch, pages, streaming=True)
+    query = PrestoQuery(req, "SELECT 1", prefetch_pages=prefetch_pages)
+
+    assert list(query.execute()) == [[1, "a"], [2, None], [3, [1.5, {"k": True}]]]
+    assert query.stats["page"] == len(pages) - 1
+    assert fake_query.urls == [FakePagedQuery.url(i) for i in range(len(pages))]
+
+
+def test_presto_fetch_error_streaming():
+    pytest.importorskip("ijson")
+    req = PrestoRequest(
+        host="coordinator", port=8080, client_session=ClientSession(user="test"), streaming=True
+    )
+
+    with pytest.raises(prestodb.exceptions.PrestoUserError) as exception_info:
+        req.process(make_http_response(RESP_ERROR_GET_0))
+    assert exception_info.value.error_name == "SYNTAX_ERROR"
+
+
+def make_column(name, type_signature):
+    return {"name": name, "type": type_signature["rawType"], "typeSignature": type_signature}
+
+
+@pytest.mark.parametrize("use_ciso8601", [True, False])
+def test_query_python_types(monkeypatch, use_ciso8601):
+    if not use_ciso8601:
+        monkeypatch.setattr(prestodb.client, "ciso8601", None)
+    columns = [
+        make_column("c_varchar", {"rawType": "varchar", "arguments": []}),
+        make_column("c_decimal", {"rawType": "decimal", "arguments": []}),
+        make_column("c_date", {"rawType": "date", "arguments": []}),
+        make_column("c_timestamp", {"rawType": "timestamp", "arguments": []}),
+        make_column("c_array", {
+            "rawType": "array",
+            "arguments": [{"kind": "TYPE", "value": {"rawType": "date", "arguments": []}}],
+        }),
+        make_column("c_timestamp_tz", {"rawType": "timestamp with time zone", "arguments": []}),
+        make_column("c_time", {"rawType": "time", "arguments": []}),
+        make_column("c_time_tz", {"rawType": "time with time zone", "arguments": []}),
+    ]
+    pages = [
+        [[
+            "a",
+            "1.10",
+            "2020-01-02",
+            "2020-01-02 03:04:05.678",
+            ["2020-01-02", None],
+            "2020-01-02 03:04:05.678 +01:00",
+            "03:04:05.678",
+            "03:04:05.678-02:30",
+        ]],
+        [[None] * len(columns)],
+    ]
+    fake_query, req = serve_paged_query(monkeypatch, pages, columns=columns)
+    query = PrestoQuery(req, "SELECT 1", experimental_python_types=True)
+
+    assert list(query.execute()) == [
+        [
+            "a",
+            Decimal("1.10"),
+            date(2020, 1, 2),
+            datetime(2020, 1, 2, 3, 4, 5, 678000),
+            [date(2020, 1, 2), None],
+            datetime(2020, 1, 2, 3, 4, 5, 678000, tzinfo=timezone(timedelta(hours=1))),
+            datetime_time(3, 4, 5, 678000),
+            datetime_time(3, 4, 5, 678000, tzinfo=timezone(-timedelta(hours=2, minutes=30))),
+        ],
+        [None] * len(columns),
+    ]
+
+
+@pytest.mark.parametrize(
+    "raw_type, value",
+    [("decimal", "not a decimal"), ("date", "not a date"), ("timestamp", "2020-13-45 25:00:00.000")],
+)
+def test_query_python_types_data_error(monkeypatch, raw_type, value):
+    columns = [
+        make_column("c_varchar", {"rawType": "varchar", "arguments": []}),
+        make_column("c_value", {"rawType": raw_type, "arguments": []}),
+    ]
+    fake_query, req = serve_paged_query(monkeypatch, [[["a", value]]], columns=columns)
+    query = PrestoQuery(req, "SELECT 1", experimental_python_types=True)
+
+    with pytest.raises(prestodb.exceptions.DataError) as exception_info:
+        list(query.execute())
+    assert value in str(exception_info.value)
+
+
+def test_query_fetch_arrow(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    columns = [
+        make_column("c_bigint", {"rawType": "bigint", "arguments": []}),
+        make_column("c_double", {"rawType": "double", "arguments": []}),
+        make_column("c_decimal", {
+            "rawType": "decimal",
+            "arguments": [{"kind": "LONG_LITERAL", "value": 10}, {"kind": "LONG_LITERAL", "value": 2}],
+        }),
+        make_column("c_timestamp", {"rawType": "timestamp", "arguments": []}),
+        make_column("c_varchar", {"rawType": "varchar", "arguments": []}),
+    ]
+    pages = [
+        [],
+        [[1, 1.5, "1.10", "2020-01-02 03:04:05.678", "a"]],
+        [[None, "NaN", None, None, None]],
+    ]
+    fake_query, req = serve_paged_query(monkeypatch, pages, columns=columns)
+    query = PrestoQuery(req, "SELECT 1")
+    query.execute()
+    batches = list(query.fetch_arrow())
+
+    assert len(batches) == 2
+    table = pa.Table.from_batches(batches)
+    assert table.schema.types == [
+        pa.int64(), pa.float64(), pa.decimal128(10, 2), pa.timestamp("us"), pa.string()
+    ]
+    rows = table.to_pylist()
+    assert rows[0] == {
+        "c_bigint": 1,
+        "c_double": 1.5,
+        "c_decimal": Decimal("1.10"),
+        "c_timestamp": datetime(2020, 1, 2, 3, 4, 5, 678000),
+        "c_varchar": "a",
+    }
+    assert rows[1]["c_bigint"] is None
+    assert rows[1]["c_double"] != rows[1]["c_double"]
+
+
+def test_query_fetch_arrow_nested_types(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    decimal_type = {
+        "rawType": "decimal",
+        "arguments": [{"kind": "LONG_LITERAL", "value": 5}, {"kind": "LONG_LITERAL", "value": 2}],
+    }
+    varchar_type = {"rawType": "varchar", "arguments": []}
+    columns = [
+        make_column("c_decimals", {
+            "rawType": "array", "arguments": [{"kind": "TYPE", "value": decimal_type}],
+        }),
+        make_column("c_map", {
+            "rawType": "map",
+            "arguments": [{"kind": "TYPE", "value": varchar_type}, {"kind": "TYPE", "value": varchar_type}],
+        }),
+        make_column("c_row", {
+            "rawType": "row",
+            "arguments": [{
+                "kind": "NAMED_TYPE",
+                "value": {"fieldName": {"name": "x", "delimited": False}, "typeSignature": varchar_type},
+            }],
+        }),
+    ]
+    pages = [
+        [[None, None, None]],
+        [[["1.10", None], {"k": "v"}, ["a"]]],
+    ]
+    fake_query, req = serve_paged_query(monkeypatch, pages, columns=columns)
+    query = PrestoQuery(req, "SELECT 1")
+    query.execute()
+    batches = list(query.fetch_arrow())
+
+    assert len(batches) == 2
+    table = pa.Table.from_batches(batches)
+    assert table.schema.types == [pa.list_(pa.decimal128(5, 2)), pa.string(), pa.string()]
+    assert table.to_pylist() == [
+        {"c_decimals": None, "c_map": None, "c_row": None},
+        {"c_decimals": [Decimal("1.10"), None], "c_map": '{"k": "v"}', "c_row": '["a"]'},
+    ]
+
+
+def test_query_fetch_arrow_empty_result(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    columns = [make_column("c_bigint", {"rawType": "bigint", "arguments": []})]
+    fake_query, req = serve_paged_query(monkeypatch, [[], []], columns=columns)
+    query = PrestoQuery(req, "SELECT 1")
+    query.execute()
+    table = pa.Table.from_batches(query.fetch_arrow())
+
+    assert table.num_rows == 0
+    assert table.schema == pa.schema([pa.field("c_bigint", pa.int64())])